@@ -1,7 +1,11 @@
+import math
+
 import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
 
+from kernels import SHAPE_ID, lttb, signal_kernel
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="Aliasing and DFT Visualizer",
@@ -9,6 +13,14 @@ st.set_page_config(
     layout="wide"
 )
 
+# --- Constants ---
+# Time axis settings
+T_DISPLAY = 0.1  
+V_MAX = 15       # Maximum voltage range +/- 15V
+N_ANALOG = 10000  # Number of points for a "smooth" signal
+N_DISPLAY = 1000  # Max. number of analog points sent to the browser
+N_SAMPLES_MAX = 4096  # Upper bound on the number of digital samples
+
 # --- Sidebar (Controls) ---
 st.sidebar.title("Parameters")
 
@@ -46,158 +58,260 @@ how DC offset and aliasing affect the frequency spectrum (DFT result).
 # --- Helper Functions ---
 def get_signal_value(t, shape, freq, amp, dc):
     """Calculates the signal value at a given time point."""
-    omega = 2 * np.pi * freq
-    value = 0
-    if shape == 'sine':
-        value = np.sin(omega * t)
-    elif shape == 'square':
-        value = np.sign(np.sin(omega * t))
-    elif shape == 'triangle':
-        # Approximation of a triangle signal
-        value = (2 / np.pi) * np.arcsin(np.sin(omega * t))
-    elif shape == 'sawtooth':
-        # Approximation of a sawtooth signal
-        value = 2 * (t * freq - np.floor(0.5 + t * freq))
-    
-    return dc + amp * value
+    t = np.ascontiguousarray(t, dtype=np.float64)
+    # Phases are computed in double precision, but float32 is plenty for
+    # display and halves the payload sent to the browser
+    out = np.empty(t.shape, dtype=np.float32)
+    signal_kernel(t, SHAPE_ID.get(shape, -1), float(freq), float(amp), float(dc), out)
+    return out
+
+# Arrays in st.cache_resource are shared by all sessions without copying,
+# so they are made read-only to keep any caller from modifying them.
+def _read_only(a):
+    a.flags.writeable = False
+    return a
+
+@st.cache_resource
+def _analog_time_axis():
+    """Dense time grid simulating a continuous signal, allocated once."""
+    return _read_only(np.linspace(0.0, T_DISPLAY, N_ANALOG))
+
+@st.cache_resource(max_entries=64)
+def sample_grid(fs):
+    """Digital sample times for the sampling frequency ``fs``.
+
+    Samples are spaced exactly 1/fs apart; the count is clamped to
+    N_SAMPLES_MAX in case the slider range is ever widened.
+    """
+    n_samples = min(int(T_DISPLAY * fs) + 1, N_SAMPLES_MAX)
+    return _read_only(np.arange(n_samples, dtype=np.float64) * (1.0 / fs))
+
+@st.cache_resource(max_entries=64)
+def _display_sample_grid(fs):
+    """float32 copy of ``sample_grid(fs)`` for plotting."""
+    return _read_only(sample_grid(fs).astype(np.float32))
+
+@st.cache_resource(max_entries=256)
+def _display_wave(shape, freq, n_out):
+    """Downsampled unit-amplitude, zero-DC analog waveform for the browser.
+
+    Keyed on shape and frequency only, so the dense evaluation and LTTB
+    rerun only when one of those changes. LTTB picks the same points
+    regardless of amplitude and DC offset, which the caller applies.
+    """
+    v = get_signal_value(T_ANALOG, shape, freq, 1.0, 0.0)
+    t, v = lttb(T_ANALOG, v, n_out)
+    return _read_only(t.astype(np.float32)), _read_only(v)
+
+@st.cache_resource(max_entries=1024)
+def _sample_values(shape, freq, fs):
+    """Unit-amplitude, zero-DC waveform at the digital sample times."""
+    return _read_only(get_signal_value(sample_grid(fs), shape, freq, 1.0, 0.0))
+
+# Streamlit re-executes the script on every interaction, so the "constant"
+# time axis is fetched from the resource cache rather than rebuilt.
+T_ANALOG = _analog_time_axis()
 
 # --- Plot 1: Time Domain ---
-st.header("Signal Plot in Time Domain")
+def make_time_fig():
+    """Builds the time-domain figure skeleton."""
+    fig = go.Figure()
 
-# Time axis settings
-T_DISPLAY = 0.1  
-V_MAX = 15       # Maximum voltage range +/- 15V
-N_ANALOG = 10000  # Number of points for a "smooth" signal
+    # 1. Analog signal (continuous), drawn with WebGL instead of SVG
+    fig.add_trace(go.Scattergl(
+        x=[], 
+        y=[], 
+        mode='lines', 
+        name='Analog Signal',
+        line=dict(color='blue', width=2)
+    ))
 
-# Time and value vectors
-t_analog = np.linspace(0, T_DISPLAY, N_ANALOG) # Simulation of a continuous signal
-v_analog = get_signal_value(t_analog, signal_shape, signal_freq, amplitude, dc_offset)
-
-# Digital samples
-dt_sample = 1 / sampling_freq # sampling period
-n_samples = int(T_DISPLAY * sampling_freq) + 1
-t_sample = np.linspace(0, T_DISPLAY, n_samples) # Digital sample times
-v_sample = get_signal_value(t_sample, signal_shape, signal_freq, amplitude, dc_offset)
-
-# Create Plotly figure
-fig_time = go.Figure()
-
-# 1. Analog signal (continuous)
-fig_time.add_trace(go.Scatter(
-    x=t_analog, 
-    y=v_analog, 
-    mode='lines', 
-    name='Analog Signal',
-    line=dict(color='blue', width=2)
-))
-
-# 2. Digital Samples
-fig_time.add_trace(go.Scatter(
-    x=t_sample, 
-    y=v_sample, 
-    mode='markers', 
-    name='Digital Samples',
-    marker=dict(color='yellow', size=8, symbol='circle')
-))
-
-# 3. DC Offset Line
-fig_time.add_shape(
-    type='line',
-    x0=0, y0=dc_offset, x1=T_DISPLAY, y1=dc_offset,
-    line=dict(color='red', width=2, dash='dash'),
-    name='V_DC'
-)
+    # 2. Digital Samples
+    fig.add_trace(go.Scatter(
+        x=[], 
+        y=[], 
+        mode='markers', 
+        name='Digital Samples',
+        marker=dict(color='yellow', size=8, symbol='circle')
+    ))
 
-# Layout settings
-fig_time.update_layout(
-    xaxis_title='Time (s)',
-    yaxis_title='Voltage (V)',
-    yaxis_range=[-V_MAX, V_MAX],
-    plot_bgcolor='#1f2937',  # bg-gray-800
-    paper_bgcolor='#1f2937', # bg-gray-800
-    font_color='#d1d5db'     # text-gray-300
-)
+    # 3. DC Offset Line
+    fig.add_shape(
+        type='line',
+        x0=0, y0=0, x1=T_DISPLAY, y1=0,
+        line=dict(color='red', width=2, dash='dash'),
+        name='V_DC'
+    )
+
+    # Layout settings
+    fig.update_layout(
+        xaxis_title='Time (s)',
+        yaxis_title='Voltage (V)',
+        yaxis_range=[-V_MAX, V_MAX],
+        plot_bgcolor='#1f2937',  # bg-gray-800
+        paper_bgcolor='#1f2937', # bg-gray-800
+        font_color='#d1d5db'     # text-gray-300
+    )
+    return fig
 
-st.plotly_chart(fig_time, use_container_width=True)
+def session_time_fig():
+    """Returns this session's time-domain figure, building it on first use.
+
+    Only the trace data and the DC line position change between reruns,
+    so those are patched in place instead of rebuilding the figure. The
+    figure is kept per session because sessions rerun concurrently in
+    separate threads and must not patch a shared object.
+    """
+    if '_time_fig' not in st.session_state:
+        st.session_state['_time_fig'] = make_time_fig()
+    return st.session_state['_time_fig']
+
+def render_time_plot(dc_offset, amplitude, signal_shape, signal_freq, sampling_freq):
+    """Draws the analog signal, its digital samples and the DC level."""
+    st.header("Signal Plot in Time Domain")
+
+    # Simulation of a continuous signal (reduced to display resolution)
+    # and its digital samples
+    t_analog, v_analog = _display_wave(signal_shape, signal_freq, N_DISPLAY)
+    v_sample = _sample_values(signal_shape, signal_freq, sampling_freq)
+    v_analog = dc_offset + amplitude * v_analog
+    v_sample = dc_offset + amplitude * v_sample
+
+    t_sample = _display_sample_grid(sampling_freq) # Digital sample times
+
+    # Patch the session's figure with the current parameters
+    fig_time = session_time_fig()
+    fig_time.data[0].x = t_analog
+    fig_time.data[0].y = v_analog
+    fig_time.data[1].x = t_sample
+    fig_time.data[1].y = v_sample
+    fig_time.layout.shapes[0].update(y0=dc_offset, y1=dc_offset)
+
+    st.plotly_chart(fig_time, use_container_width=True)
 
 
 # --- Plot 2: Frequency Domain ---
-st.header("Frequency Spectrum (Ideal DFT)")
+def _nice_step(span, target_ticks=6):
+    """Tick spacing of the form 1, 2 or 5 times a power of ten."""
+    raw = span / target_ticks
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for m in (1, 2, 5, 10):
+        if m * magnitude >= raw:
+            return m * magnitude
 
-if sampling_freq <= 0:
-    st.error("Sampling frequency must be greater than 0.")
-else:
-    f_nyquist = sampling_freq / 2
-    
-    if f_nyquist == 0:
-        st.error("Nyquist frequency is 0, cannot draw the spectrum.")
+def freq_spectrum_svg(dc_offset, amplitude, f_alias, f_nyquist):
+    """Renders the ideal DFT bins as a small inline SVG.
+
+    The chart has at most two bars, the Nyquist line and a label, so a
+    hand-written SVG of under 2 KB replaces a full Plotly figure.
+    """
+    width, height = 800, 360
+    left, right, top, bottom = 60, 20, 20, 50
+    x_min, x_max = -0.5, f_nyquist + 5 # Show a bit beyond Nyquist
+    plot_w = width - left - right
+    plot_h = height - top - bottom
+
+    def px(f):
+        return left + (f - x_min) / (x_max - x_min) * plot_w
+
+    def py(v):
+        v = min(max(v, 0.0), V_MAX)
+        return top + (1 - v / V_MAX) * plot_h
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+        f'width="100%" font-family="sans-serif" font-size="12" fill="#d1d5db">',
+        f'<rect width="{width}" height="{height}" fill="#1f2937"/>',
+        f'<clipPath id="freq-plot-area"><rect x="{left}" y="{top}" '
+        f'width="{plot_w}" height="{plot_h}"/></clipPath>',
+    ]
+
+    # Grid and ticks
+    for v in range(0, V_MAX + 1, 5):
+        y = py(v)
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_w}" '
+                     f'y2="{y:.1f}" stroke="#374151"/>')
+        parts.append(f'<text x="{left - 8}" y="{y + 4:.1f}" text-anchor="end">{v}</text>')
+    step = _nice_step(x_max - x_min)
+    f = 0.0
+    while f <= x_max:
+        parts.append(f'<text x="{px(f):.1f}" y="{top + plot_h + 18}" '
+                     f'text-anchor="middle">{f:g}</text>')
+        f += step
+    parts.append(f'<text x="{left + plot_w / 2:.1f}" y="{height - 8}" '
+                 f'text-anchor="middle">Frequency (Hz)</text>')
+    parts.append(f'<text transform="translate(16 {top + plot_h / 2:.1f}) rotate(-90)" '
+                 f'text-anchor="middle">Amplitude (V)</text>')
+
+    # Bins (DC at 0 Hz, AC signal or its alias)
+    bar_width = max(1, f_nyquist * 0.02)
+    legend = []
+    bins = []
+    if dc_offset != 0:
+        bins.append((0, dc_offset, '#34d399', f'DC Component ({dc_offset:.1f} V)')) # emerald-400
+    if amplitude > 0:
+        bins.append((f_alias, amplitude, '#60a5fa', f'AC Signal ({f_alias:.1f} Hz)')) # blue-400
+    for f_bin, value, color, label in bins:
+        x0, x1 = px(f_bin - bar_width / 2), px(f_bin + bar_width / 2)
+        y0 = py(value)
+        parts.append(f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{x1 - x0:.1f}" '
+                     f'height="{py(0) - y0:.1f}" fill="{color}" '
+                     f'clip-path="url(#freq-plot-area)"/>')
+        legend.append((color, label))
+
+    # Nyquist line
+    y_top = max(amplitude, dc_offset, 1)
+    x_n = px(f_nyquist)
+    parts.append(f'<line x1="{x_n:.1f}" y1="{py(0):.1f}" x2="{x_n:.1f}" '
+                 f'y2="{py(y_top):.1f}" stroke="red" stroke-width="2" '
+                 f'stroke-dasharray="6 4"/>')
+    # Anchored at its right end so the label stays inside the viewBox
+    parts.append(f'<text x="{x_n - 6:.1f}" y="{py(y_top * 1.1):.1f}" '
+                 f'text-anchor="end" fill="red">f_N = {f_nyquist:.1f} Hz</text>')
+
+    # Legend
+    for i, (color, label) in enumerate(legend):
+        y = top + 14 + i * 18
+        parts.append(f'<rect x="{width - right - 170}" y="{y - 9}" width="10" '
+                     f'height="10" fill="{color}"/>')
+        parts.append(f'<text x="{width - right - 154}" y="{y}">{label}</text>')
+
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def render_freq_plot(dc_offset, amplitude, signal_freq, sampling_freq):
+    """Draws the ideal DFT bins of the sampled signal."""
+    st.header("Frequency Spectrum (Ideal DFT)")
+
+    if sampling_freq <= 0:
+        st.error("Sampling frequency must be greater than 0.")
     else:
-        # Calculating the alias
-        is_aliased = False
-        
-        # We use modulo to "wrap" the frequency
-        f_alias = signal_freq % sampling_freq
-        
-        # Mirror reflection from the Nyquist frequency
-        if f_alias > f_nyquist:
-            f_alias = sampling_freq - f_alias
-            
-        if abs(f_alias - signal_freq) > 0.01: # Simple test for aliasing
-             is_aliased = True
-
-        # Create plot (using bar for "bins")
-        fig_freq = go.Figure()
-
-        # 1. DC Bin (0 Hz)
-        if dc_offset != 0:
-            fig_freq.add_trace(go.Bar(
-                x=[0],
-                y=[dc_offset],
-                name=f'DC Component ({dc_offset:.1f} V)', # Corrected unit to V
-                marker_color='#34d399', # emerald-400
-                width=max(1, f_nyquist * 0.02) # Bar width
-            ))
-
-        # 2. AC Bin (signal or its alias)
-        if amplitude > 0:
-            fig_freq.add_trace(go.Bar(
-                x=[f_alias],
-                y=[amplitude],
-                name=f'AC Signal ({f_alias:.1f} Hz)',
-                marker_color='#60a5fa', # blue-400
-                width=max(1, f_nyquist * 0.02)
-            ))
-
-        # 3. Nyquist Line
-        fig_freq.add_shape(
-            type='line',
-            x0=f_nyquist, y0=0, x1=f_nyquist, y1=max(amplitude, dc_offset, 1) ,
-            line=dict(color='red', width=2, dash='dash'),
-            name='f_Nyquist'
-        )
-        fig_freq.add_annotation(
-            x=f_nyquist, y=max(amplitude, dc_offset, 1) * 1.1,
-            text=f'f_N = {f_nyquist:.1f} Hz',
-            showarrow=False, xshift=10, align="left",
-            font=dict(color='red')
-        )
-
-        # Layout settings
-        fig_freq.update_layout(
-            xaxis_title='Frequency (Hz)',
-            yaxis_title='Amplitude (V)',
-            xaxis_range=[-0.5, f_nyquist + 5], # Show a bit beyond Nyquist
-            yaxis_range=[0, V_MAX],
-            plot_bgcolor='#1f2937',
-            paper_bgcolor='#1f2937',
-            font_color='#d1d5db',
-            showlegend=True
-        )
-        
-        st.plotly_chart(fig_freq, use_container_width=True)
-
-        # Aliasing message
-        if is_aliased and amplitude > 0:
-            st.warning(f"**Aliasing Occurred!** A signal with frequency {signal_freq} Hz is visible as a bin at **{f_alias:.1f} Hz**.")
-        elif amplitude > 0:
-            st.success(f"Sampling correct. The {signal_freq} Hz signal is displayed correctly.")
\ No newline at end of file
+        f_nyquist = sampling_freq / 2
+    
+        if f_nyquist == 0:
+            st.error("Nyquist frequency is 0, cannot draw the spectrum.")
+        else:
+            # Calculating the alias: "wrap" the frequency with modulo, then
+            # mirror it about the Nyquist frequency. Everything stays in
+            # integers: 2*m is compared with f_s rather than m with f_s/2.
+            m = signal_freq % sampling_freq
+            f_alias = m if 2 * m <= sampling_freq else sampling_freq - m
+
+            # Slider frequencies are integers, so the comparison is exact
+            is_aliased = f_alias != signal_freq
+
+            # Draw the bins as an inline SVG
+            st.markdown(
+                freq_spectrum_svg(dc_offset, amplitude, f_alias, f_nyquist),
+                unsafe_allow_html=True
+            )
+
+            # Aliasing message
+            if is_aliased and amplitude > 0:
+                st.warning(f"**Aliasing Occurred!** A signal with frequency {signal_freq} Hz is visible as a bin at **{f_alias:.1f} Hz**.")
+            elif amplitude > 0:
+                st.success(f"Sampling correct. The {signal_freq} Hz signal is displayed correctly.")
+
+
+render_time_plot(dc_offset, amplitude, signal_shape, signal_freq, sampling_freq)
+render_freq_plot(dc_offset, amplitude, signal_freq, sampling_freq)
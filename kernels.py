@@ -0,0 +1,175 @@
+"""Signal-generation kernels used by the Streamlit app.
+
+They live in their own module so they are compiled once per process:
+Streamlit re-executes ``app.py`` on every interaction, but imported
+modules stay in ``sys.modules``. The explicit signatures make Numba
+compile eagerly on import, and ``cache=True`` lets later launches load
+the machine code from disk instead of recompiling.
+
+Numba is optional. Without it the same functions fall back to NumPy,
+using the same phase-reduction formulas as the JIT kernel.
+"""
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+# Integer shape codes used for dispatch inside the kernel
+SHAPE_ID = {'sine': 0, 'square': 1, 'triangle': 2, 'sawtooth': 3}
+
+if HAVE_NUMBA:
+    from numba import types
+
+    # The app shares its time axes between sessions as read-only arrays.
+    # Input arrays are typed read-only, which writable arrays also convert to.
+    _F8_C_RO = types.Array(types.float64, 1, 'C', readonly=True)
+    _F8_A_RO = types.Array(types.float64, 1, 'A', readonly=True)
+    _F4_A_RO = types.Array(types.float32, 1, 'A', readonly=True)
+    _F4_C = types.Array(types.float32, 1, 'C')
+    _LTTB_RESULT = types.Tuple((types.Array(types.float64, 1, 'C'), _F4_C))
+
+    # The kernel writes one fused pass into a preallocated ``out`` buffer
+    # instead of materializing a temporary array per NumPy ufunc. The shape
+    # switch sits outside the loops, so each branch is a tight loop of its own.
+    # It is deliberately single-threaded: Streamlit calls it from one script
+    # thread per session, and a few thousand points gain nothing from prange.
+    @numba.njit(
+        types.void(_F8_C_RO, types.int64, types.float64, types.float64,
+                   types.float64, _F4_C),
+        cache=True, fastmath=True,
+    )
+    def signal_kernel(t, shape_id, freq, amp, dc, out):
+        n = t.shape[0]
+        if shape_id == 0:
+            omega = 2.0 * math.pi * freq
+            for i in range(n):
+                out[i] = dc + amp * math.sin(omega * t[i])
+        elif shape_id == 1:
+            # High for the first half of each period, low for the second half
+            for i in range(n):
+                phase = t[i] * freq
+                value = 1.0 if phase - math.floor(phase) < 0.5 else -1.0
+                out[i] = dc + amp * value
+        elif shape_id == 2:
+            # Phase-folded piecewise-linear triangle, equal to (2/pi)*asin(sin(wt))
+            # without evaluating either transcendental
+            for i in range(n):
+                phase = t[i] * freq + 0.25
+                value = 1.0 - 4.0 * abs(phase - math.floor(phase) - 0.5)
+                out[i] = dc + amp * value
+        elif shape_id == 3:
+            # Approximation of a sawtooth signal
+            for i in range(n):
+                phase = t[i] * freq
+                value = 2.0 * (phase - math.floor(0.5 + phase))
+                out[i] = dc + amp * value
+        else:
+            for i in range(n):
+                out[i] = dc
+
+    @numba.njit(
+        _LTTB_RESULT(_F8_A_RO, _F4_A_RO, types.int64),
+        cache=True,
+    )
+    def lttb(x, y, n_out):
+        """Largest-Triangle-Three-Buckets downsampling of a line trace.
+
+        Keeps the first and last points and, from each of the ``n_out - 2``
+        buckets in between, the point forming the largest triangle with the
+        previously kept point and the mean of the next bucket.
+        """
+        n = x.shape[0]
+        if n_out >= n or n_out < 3:
+            return x.copy(), y.copy()
+
+        x_out = np.empty(n_out, dtype=x.dtype)
+        y_out = np.empty(n_out, dtype=y.dtype)
+        x_out[0] = x[0]
+        y_out[0] = y[0]
+
+        every = (n - 2) / (n_out - 2)
+        a = 0
+        for i in range(n_out - 2):
+            # Mean of the next bucket
+            start = int(math.floor((i + 1) * every)) + 1
+            end = min(int(math.floor((i + 2) * every)) + 1, n)
+            avg_x = 0.0
+            avg_y = 0.0
+            for j in range(start, end):
+                avg_x += x[j]
+                avg_y += y[j]
+            avg_x /= end - start
+            avg_y /= end - start
+
+            # Point of the current bucket with the largest triangle area
+            lo = int(math.floor(i * every)) + 1
+            hi = int(math.floor((i + 1) * every)) + 1
+            max_area = -1.0
+            best = lo
+            for j in range(lo, hi):
+                area = abs((x[a] - avg_x) * (y[j] - y[a])
+                           - (x[a] - x[j]) * (avg_y - y[a]))
+                if area > max_area:
+                    max_area = area
+                    best = j
+
+            x_out[i + 1] = x[best]
+            y_out[i + 1] = y[best]
+            a = best
+
+        x_out[n_out - 1] = x[n - 1]
+        y_out[n_out - 1] = y[n - 1]
+        return x_out, y_out
+
+else:
+    def signal_kernel(t, shape_id, freq, amp, dc, out):
+        if shape_id == 0:
+            value = np.sin(2.0 * math.pi * freq * t)
+        elif shape_id == 1:
+            phase = t * freq
+            value = np.where(phase - np.floor(phase) < 0.5, 1.0, -1.0)
+        elif shape_id == 2:
+            phase = t * freq + 0.25
+            value = 1.0 - 4.0 * np.abs(phase - np.floor(phase) - 0.5)
+        elif shape_id == 3:
+            phase = t * freq
+            value = 2.0 * (phase - np.floor(0.5 + phase))
+        else:
+            out.fill(dc)
+            return
+        np.multiply(value, amp, out=out, casting='same_kind')
+        out += dc
+
+    def lttb(x, y, n_out):
+        """Largest-Triangle-Three-Buckets downsampling of a line trace.
+
+        NumPy version of the JIT kernel above: the inner bucket scans are
+        vectorized, only the loop over buckets runs in Python. Ties and
+        float32 rounding can make it pick a few different points.
+        """
+        n = x.shape[0]
+        if n_out >= n or n_out < 3:
+            return x.copy(), y.copy()
+
+        edges = np.floor(np.arange(n_out) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+        edges[-1] = n
+        idx = np.empty(n_out, dtype=np.int64)
+        idx[0] = 0
+        idx[-1] = n - 1
+        a = 0
+        for i in range(n_out - 2):
+            lo, hi = edges[i], edges[i + 1]
+            nxt = slice(hi, edges[i + 2])
+            avg_x = x[nxt].mean()
+            avg_y = y[nxt].mean(dtype=np.float64)
+            area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a])
+                          - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+            a = lo + int(np.argmax(area))
+            idx[i + 1] = a
+        return x[idx], y[idx]